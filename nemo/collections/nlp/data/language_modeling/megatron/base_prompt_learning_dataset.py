@@ -45,7 +45,7 @@ class BasePromptLearningDataset(Dataset):
         self.virtual_prompt_source = virtual_prompt_source
         self.task_templates = task_templates
         self.pseudo_tokens = pseudo_tokens
-        self.pseudo_token_ids = set(self.tokenizer.tokens_to_ids(self.pseudo_tokens))
+        self.pseudo_token_ids = frozenset(self.tokenizer.tokens_to_ids(self.pseudo_tokens))
         self.pad_token_id = pad_token_id
         self.max_seq_length = max_seq_length
         self.min_seq_length = min_seq_length
@@ -17,10 +17,11 @@ import os
 import pickle
 
 import torch
+import torch.nn.functional as F
+from torch.nn.utils.rnn import pad_sequence
 from tqdm.auto import tqdm
 
 from nemo.collections.nlp.modules.common import VirtualPromptSource
-from nemo.collections.nlp.modules.common.megatron.utils import build_position_ids
 from nemo.core import Dataset
 from nemo.utils import AppState, logging
 
@@ -67,7 +68,8 @@ class GPTPromptLearningDataset(Dataset):
         self.virtual_prompt_source = virtual_prompt_source
         self.task_templates = task_templates
         self.pseudo_tokens = pseudo_tokens
-        self.pseudo_token_ids = set(self.tokenizer.tokens_to_ids(self.pseudo_tokens))
+        self.pseudo_token_ids = frozenset(self.tokenizer.tokens_to_ids(self.pseudo_tokens))
+        self._pseudo_token_ids_tensor = torch.tensor(sorted(self.pseudo_token_ids), dtype=torch.long)
         self.pad_token_id = pad_token_id
         self.max_seq_length = max_seq_length
         self.min_seq_length = min_seq_length
@@ -75,6 +77,7 @@ class GPTPromptLearningDataset(Dataset):
         self.add_eos = add_eos
         self.for_train = for_train
         self.examples = []
+        self._causal_mask_cache = {}
 
         if not self.for_train:
             self.tokens_to_generate = tokens_to_generate
@@ -121,6 +124,11 @@ class GPTPromptLearningDataset(Dataset):
                      containing the information needed for a training example
         """
         skipped = 0
+        taskname_ids_cache = {}
+
+        # Some tokenizers (e.g. legacy SentencePiece) resolve these ids through a token lookup on every access
+        bos_id = self.tokenizer.bos_id if self.add_bos else None
+        eos_id = self.tokenizer.eos_id if self.add_eos else None
 
         for json_line in tqdm(dataset):
 
@@ -159,9 +167,9 @@ class GPTPromptLearningDataset(Dataset):
 
             # Add BOS/EOS if desired, adds EOS by default
             if self.add_bos:
-                input_ids = [self.tokenizer.bos_id] + input_ids
+                input_ids = [bos_id] + input_ids
             if self.add_eos:
-                input_ids = input_ids + [self.tokenizer.eos_id]
+                input_ids = input_ids + [eos_id]
 
             # Try to truncate input text to fit into the max sequence length
             if len(input_ids) > self.max_seq_length:
@@ -178,7 +186,10 @@ class GPTPromptLearningDataset(Dataset):
             # Skip example if the final length doesn't fit length requirements even after truncation
             if self.min_seq_length <= len(input_ids) <= self.max_seq_length:
                 if self.virtual_prompt_source == VirtualPromptSource.PROMPT_ENCODER:
-                    taskname_id = self.tokenizer.text_to_ids(taskname)
+                    # Every example of a task shares the same taskname ids, only tokenize it once
+                    if taskname not in taskname_ids_cache:
+                        taskname_ids_cache[taskname] = self.tokenizer.text_to_ids(taskname)
+                    taskname_id = taskname_ids_cache[taskname]
                 elif self.virtual_prompt_source == VirtualPromptSource.NO_PROMPT:
                     taskname_id = -1
                 else:
@@ -325,7 +336,8 @@ class GPTPromptLearningDataset(Dataset):
         return len(self.examples)
 
     def __getitem__(self, idx):
-        return self.examples[idx]
+        taskname_id, input_ids, answer_start_idx = self.examples[idx]
+        return taskname_id, torch.as_tensor(input_ids, dtype=torch.long), answer_start_idx
 
     def _ceil_to_nearest(self, n, m):
         return (n + m - 1) // m * m
@@ -359,54 +371,66 @@ class GPTPromptLearningDataset(Dataset):
         # since tp_workers is always a multiple of 2. the padding to multiple of 8 is to ensure an mem-optimized softmax is used.
         batch_max = ceil_batch_max + 1
         input_ids, loss_mask = self.pad_batch_and_build_loss_mask(input_ids, batch_max, answer_starts)
+        batch_size = len(input_ids)
+        batch_max -= 1  # inputs, labels and loss mask below are all one token shorter than the padded batch
+        shape = (batch_size, batch_max)
+
+        # Copy the outputs into page-locked memory when collating in the main process, so the DataLoader does not
+        # copy them again and .cuda(non_blocking=True) is asynchronous. Worker processes must not touch CUDA.
+        pin_memory = torch.utils.data.get_worker_info() is None and torch.cuda.is_available()
+
         # Should be a label for every token in batch, label is the next token
-        labels = input_ids[:, 1:].contiguous()
-        input_ids = input_ids[:, :-1].contiguous()
-        batch_max -= 1  # @adithyare I *think* this negatition is done to account for the above 2 lines which removes one item from the input_ids seq.
+        labels = torch.empty(shape, dtype=torch.long, pin_memory=pin_memory).copy_(input_ids[:, 1:])
+        input_ids = torch.empty(shape, dtype=torch.long, pin_memory=pin_memory).copy_(input_ids[:, :-1])
 
         # Loss mask should align with labels
-        loss_mask = loss_mask[:, 1:].contiguous()
-
-        # Using causal attention mask for whole input
-        batch_size = len(input_ids)
-        attention_mask = torch.tril(torch.ones((batch_size, batch_max, batch_max))).view(
-            batch_size, 1, batch_max, batch_max
-        )
+        loss_mask = torch.empty(shape, dtype=torch.float, pin_memory=pin_memory).copy_(loss_mask[:, 1:])
 
-        # Convert attention mask from float to bool
-        attention_mask = attention_mask < 0.5
-        position_ids = build_position_ids(input_ids)
+        # Using causal attention mask for whole input, broadcast from the cached mask into a contiguous batch so the
+        # host to device copy does not first materialize a pageable temporary on the training thread
+        attention_mask = torch.empty((batch_size, 1, batch_max, batch_max), dtype=torch.bool, pin_memory=pin_memory)
+        attention_mask.copy_(self._get_causal_attention_mask(batch_max))
+        position_ids = torch.empty(shape, dtype=torch.long, pin_memory=pin_memory)
+        position_ids.copy_(torch.arange(batch_max, dtype=torch.long))
 
         return input_ids, labels, loss_mask, position_ids, attention_mask, taskname_ids
 
+    def _get_causal_attention_mask(self, seq_length):
+        """ Boolean causal mask of shape (1, 1, seq_length, seq_length), True where attention is masked out.
+            The mask only depends on the sequence length, so it is built once and shared across batches.
+        """
+        attention_mask = self._causal_mask_cache.get(seq_length)
+        if attention_mask is None:
+            attention_mask = torch.triu(torch.ones((seq_length, seq_length), dtype=torch.bool), diagonal=1)
+            attention_mask = attention_mask.view(1, 1, seq_length, seq_length)
+            self._causal_mask_cache[seq_length] = attention_mask
+        return attention_mask
+
     def pad_batch_and_build_loss_mask(self, input_ids, batch_max, answer_starts):
         """ Pad input_ids in batch to max batch length while building loss mask """
-        batch_loss_masks = []
-        padded_input_ids = []
-        for ids, answer_start_idx in zip(input_ids, answer_starts):
-            if answer_start_idx is not None:
-                # Loss mask where answer tokens are 1.0 and all other tokens are 0.0
-                loss_mask = [float(idx >= answer_start_idx) for idx in range(len(ids))]
-            else:
-                # Loss mask where virtual tokens are 0.0 and all other tokens are 1.0
-                loss_mask = [float(token_id not in self.pseudo_token_ids) for token_id in ids]
+        input_ids = [torch.as_tensor(ids, dtype=torch.long) for ids in input_ids]
+        lengths = torch.tensor([len(ids) for ids in input_ids], dtype=torch.long)
+
+        # Pad to the longest sequence, then to max length
+        padded_input_ids = pad_sequence(input_ids, batch_first=True, padding_value=self.pad_token_id)
+        padded_input_ids = F.pad(padded_input_ids, (0, batch_max - padded_input_ids.size(1)), value=self.pad_token_id)
+
+        positions = torch.arange(batch_max).unsqueeze(0)
 
-            # Pad to max length
-            input_length = len(ids)
-            padding_length = batch_max - input_length
-            pad_extend = [self.pad_token_id] * padding_length
-            ids = ids + pad_extend
-            padded_input_ids.append(ids)
+        # Loss mask where virtual tokens are 0.0 and all other tokens are 1.0
+        batch_loss_masks = ~torch.isin(padded_input_ids, self._pseudo_token_ids_tensor)
 
-            # Account for padding in loss mask
-            loss_mask.extend([0.0] * padding_length)
-            batch_loss_masks.append(torch.tensor(loss_mask, dtype=torch.float))
+        # Loss mask where answer tokens are 1.0 and all other tokens are 0.0
+        has_answer_start = torch.tensor([idx is not None for idx in answer_starts], dtype=torch.bool)
+        if has_answer_start.any():
+            answer_start_ids = torch.tensor([0 if idx is None else idx for idx in answer_starts], dtype=torch.long)
+            answer_loss_masks = positions >= answer_start_ids.unsqueeze(1)
+            batch_loss_masks = torch.where(has_answer_start.unsqueeze(1), answer_loss_masks, batch_loss_masks)
 
-        # Make into torch tensors
-        padded_input_ids = torch.tensor(padded_input_ids, dtype=torch.long)
-        batch_loss_masks = torch.stack(batch_loss_masks)
+        # Account for padding in loss mask
+        batch_loss_masks &= positions < lengths.unsqueeze(1)
 
-        return padded_input_ids, batch_loss_masks
+        return padded_input_ids, batch_loss_masks.float()
 
     def inference_collate_fn(self, batch):
         """
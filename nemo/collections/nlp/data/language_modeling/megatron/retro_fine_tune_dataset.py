@@ -173,8 +173,14 @@ class RetroQAFineTuneDataset(Dataset):
     def collate_fn(self, batch, tp_workers=0):
         """ Prepares input_ids, labels, loss mask, attention_mask, and position ids for global batch """
         input_ids, answer_starts, chunks = zip(*batch)
-        # convert chunks into torch tensors
-        chunks = torch.tensor(chunks)
+
+        # Copy the outputs into page-locked memory when collating in the main process, so the DataLoader does not
+        # copy them again and .cuda(non_blocking=True) is asynchronous. Worker processes must not touch CUDA.
+        pin_memory = torch.utils.data.get_worker_info() is None and torch.cuda.is_available()
+
+        # convert chunks into torch tensors, stacking the per-example numpy arrays straight into the output buffer
+        retrieved_ids = torch.empty((len(chunks),) + chunks[0].shape, dtype=torch.long, pin_memory=pin_memory)
+        np.stack(chunks, out=retrieved_ids.numpy())
 
         # Get max sequence length of batch
         batch_max = max(len(ids) for ids in input_ids)
@@ -186,16 +192,19 @@ class RetroQAFineTuneDataset(Dataset):
             resi_padding = 0
         batch_max += resi_padding
         input_ids, loss_mask = self.pad_batch_and_build_loss_mask(input_ids, batch_max, answer_starts)
+        shape = (len(input_ids), batch_max - 1)
+
         # Should be a label for every token in batch, label is the next token
-        labels = input_ids[:, 1:].contiguous()
-        input_ids = input_ids[:, :-1].contiguous()
-        batch_max -= 1
+        labels = torch.empty(shape, dtype=torch.long, pin_memory=pin_memory).copy_(input_ids[:, 1:])
+        input_ids = torch.empty(shape, dtype=torch.long, pin_memory=pin_memory).copy_(input_ids[:, :-1])
 
         # Loss mask should align with labels
-        loss_mask = loss_mask[:, 1:].contiguous()
+        loss_mask = torch.empty(shape, dtype=torch.float, pin_memory=pin_memory).copy_(loss_mask[:, 1:])
 
-        hidden_mask = input_ids != self.pad_token_id
-        context_mask = chunks != self.pad_token_id
+        hidden_mask = torch.empty(shape, dtype=torch.bool, pin_memory=pin_memory)
+        torch.ne(input_ids, self.pad_token_id, out=hidden_mask)
+        context_mask = torch.empty(retrieved_ids.shape, dtype=torch.bool, pin_memory=pin_memory)
+        torch.ne(retrieved_ids, self.pad_token_id, out=context_mask)
 
         # Using causal attention mask for whole input
 
@@ -205,32 +214,26 @@ class RetroQAFineTuneDataset(Dataset):
             'tokens_mask': hidden_mask,
             'loss_mask': loss_mask,
             'retrieved_emb_mask': context_mask,
-            'retrieved_ids': chunks,
+            'retrieved_ids': retrieved_ids,
         }
 
     def pad_batch_and_build_loss_mask(self, input_ids, batch_max, answer_starts):
         """ Pad input_ids in batch to max batch length while building loss mask """
-        batch_loss_masks = []
-        padded_input_ids = []
-        for ids, answer_start_idx in zip(input_ids, answer_starts):
-            if self.answer_only_loss and answer_start_idx is not None:
-                # Loss mask where answer tokens are 1.0 and all other tokens are 0.0
-                loss_mask = [float(idx >= answer_start_idx) for idx in range(len(ids))]
-            else:
-                # Loss mask where virtual tokens are 0.0 and all other tokens are 1.0
-                loss_mask = [1.0] * len(ids)
-            # Pad to max length
-            input_length = len(ids)
-            padding_length = batch_max - input_length
-            ids = ids + [self.pad_token_id] * padding_length
-            padded_input_ids.append(ids)
-
-            # Account for padding in loss mask
-            loss_mask.extend([0.0] * padding_length)
-            batch_loss_masks.append(torch.tensor(loss_mask, dtype=torch.float))
-
-        # Make into torch tensors
-        padded_input_ids = torch.tensor(padded_input_ids, dtype=torch.long)
-        batch_loss_masks = torch.stack(batch_loss_masks)
-
-        return padded_input_ids, batch_loss_masks
+        batch_size = len(input_ids)
+        lengths = torch.tensor([len(ids) for ids in input_ids], dtype=torch.long)
+
+        # Pad to max length
+        padded_input_ids = torch.full((batch_size, batch_max), self.pad_token_id, dtype=torch.long)
+        for i, ids in enumerate(input_ids):
+            padded_input_ids[i, : len(ids)] = torch.as_tensor(ids, dtype=torch.long)
+
+        # Loss mask where all non-padding tokens are 1.0
+        positions = torch.arange(batch_max).unsqueeze(0)
+        batch_loss_masks = positions < lengths.unsqueeze(1)
+
+        if self.answer_only_loss:
+            # Loss mask where answer tokens are 1.0 and all other tokens are 0.0
+            answer_start_ids = torch.tensor([0 if idx is None else idx for idx in answer_starts], dtype=torch.long)
+            batch_loss_masks &= positions >= answer_start_ids.unsqueeze(1)
+
+        return padded_input_ids, batch_loss_masks.float()
@@ -58,6 +58,9 @@ except (ImportError, ModuleNotFoundError):
 
 __all__ = ['MegatronBasePromptLearningModel']
 
+# Matches the {field} placeholders in a task's prompt template
+_PROMPT_TEMPLATE_FIELD_RE = re.compile(r"\{(.*?)\}")
+
 
 class MegatronBasePromptLearningModel(MegatronBaseModel, TextGeneration):
     """
@@ -175,7 +178,7 @@ class MegatronBasePromptLearningModel(MegatronBaseModel, TextGeneration):
         for task in task_templates:
             self.task_templates[task.taskname] = {
                 "prompt_template": task.prompt_template,
-                "prompt_template_fields": re.findall("\{(.*?)\}", task.prompt_template),
+                "prompt_template_fields": _PROMPT_TEMPLATE_FIELD_RE.findall(task.prompt_template),
                 "answer_only_loss": task.get("answer_only_loss", False),
                 "answer_field": task.get("answer_field", None),
                 "truncate_field": task.truncate_field,
@@ -223,8 +226,7 @@ class MegatronBasePromptLearningModel(MegatronBaseModel, TextGeneration):
         """Freeze params of existing virtual prompts that should not be tuned further
         """
         # Make sure word embeddings are frozen
-        for params in self.word_embeddings.parameters():
-            params.requires_grad = False
+        self.word_embeddings.requires_grad_(False)
 
     def state_dict(self):
         """
@@ -262,8 +264,7 @@ class MegatronBasePromptLearningModel(MegatronBaseModel, TextGeneration):
         Only want virtual prompt params to be passed to the optimizer.
         """
         ## Freeze frozen model
-        for param in self.frozen_model.parameters():
-            param.requires_grad = False
+        self.frozen_model.requires_grad_(False)
 
         virtual_prompt_params = {'params': []}
 
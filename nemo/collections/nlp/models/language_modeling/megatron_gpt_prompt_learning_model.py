@@ -118,6 +118,20 @@ class MegatronGPTPromptLearningModel(MegatronBasePromptLearningModel):
                 "activations_checkpoint_num_layers", None
             )
             frozen_model_cfg.activations_checkpoint_method = self.cfg.get("activations_checkpoint_method", None)
+            # Fused kernels only change how the frozen model is executed, keep what it was trained with unless set
+            if self.cfg.get("masked_softmax_fusion", None) is not None:
+                frozen_model_cfg.masked_softmax_fusion = self.cfg.masked_softmax_fusion
+            if self.cfg.get("persist_layer_norm", None) is not None:
+                frozen_model_cfg.persist_layer_norm = self.cfg.persist_layer_norm
+            # FP8 GEMMs run through Transformer Engine layers, which the frozen model must have been built with
+            for key in ("fp8", "fp8_e4m3", "fp8_hybrid"):
+                if self.cfg.get(key, None) is not None:
+                    frozen_model_cfg[key] = self.cfg.get(key)
+            if frozen_model_cfg.get("fp8", False):
+                if not frozen_model_cfg.get("transformer_engine", False):
+                    raise ValueError("fp8=True requires a frozen GPT model trained with transformer_engine=True")
+                if not (frozen_model_cfg.get("fp8_e4m3", False) or frozen_model_cfg.get("fp8_hybrid", False)):
+                    raise ValueError("fp8=True requires fp8_e4m3=True or fp8_hybrid=True to select the FP8 format")
 
         if self.trainer.precision == 'bf16':
             self.autocast_dtype = torch.bfloat16
@@ -314,6 +328,8 @@ class MegatronGPTPromptLearningModel(MegatronBasePromptLearningModel):
             grad_scaler=self.trainer.precision_plugin.scaler.scale if self.cfg.precision == 16 else None,
             sequence_parallel=self.cfg.get('sequence_parallel', False),
             enable_autocast=self.enable_autocast,
+            overlap_p2p_comm=self.cfg.get('overlap_p2p_comm', False),
+            batch_p2p_comm=self.cfg.get('batch_p2p_comm', True),
         )
 
         # only the last stages of the pipeline return losses
@@ -601,6 +617,11 @@ class MegatronGPTPromptLearningModel(MegatronBasePromptLearningModel):
         else:
             collate_fn = dataset.inference_collate_fn
 
+        # prefetch_factor can only be passed to the DataLoader when batches are built in worker processes
+        dataloader_kwargs = {}
+        if num_workers > 0:
+            dataloader_kwargs['prefetch_factor'] = self.cfg.data.get('prefetch_factor', 2)
+
         dataloader = torch.utils.data.DataLoader(
             dataset,
             collate_fn=collate_fn,
@@ -612,6 +633,7 @@ class MegatronGPTPromptLearningModel(MegatronBasePromptLearningModel):
             persistent_workers=True
             if num_workers > 0
             else False,  # (@adithyare and @eharper) We need this to make spawn=True to work.
+            **dataloader_kwargs,
         )
 
         return dataset, dataloader
@@ -109,6 +109,8 @@ class MegatronRetrievalModel(MegatronBaseModel, TextGeneration):
             True if (not self.megatron_amp_o2) and (self.autocast_dtype in [torch.float16, torch.bfloat16]) else False
         )
 
+        self._setup_compiled_forward()
+
         if hasattr(self.cfg, "shape_file"):
             set_base_shapes(self, self.register_artifact("shape_file", self.cfg.shape_file), rescale_params=False)
 
@@ -218,10 +220,25 @@ class MegatronRetrievalModel(MegatronBaseModel, TextGeneration):
             tokenizer=self.tokenizer,
             activations_checkpoint_granularity=self.cfg.get('activations_checkpoint_granularity', None),
             megatron_lm_compatible=self.cfg.get('megatron_lm_compatible', False),
+            use_flash_attention=self.cfg.get('use_flash_attention', False),
             version=self.cfg.get('version', 1),
         )
         return model
 
+    def _setup_compiled_forward(self):
+        """ Compile the module forward used by the training and validation steps when model.compile_forward is set.
+            Text generation calls self.model directly and stays eager, it decodes with inference key/value memory
+            at a different sequence length for every token.
+        """
+        self._compiled_model_forward = None
+        if self.cfg.get('compile_forward', False):
+            if not hasattr(torch, 'compile'):
+                raise ValueError('compile_forward=True requires PyTorch 2.0 or later')
+            # The EOD attention reset in the decoder is data dependent and breaks the graph on every batch, so the
+            # default mode is used instead of CUDA graphs. Shapes are left dynamic since fine-tuning batches are
+            # padded to a per-batch length. Compiling the bound forward keeps parameter names and checkpoints.
+            self._compiled_model_forward = torch.compile(self.model.forward)
+
     def forward(
         self,
         input_ids,
@@ -233,7 +250,8 @@ class MegatronRetrievalModel(MegatronBaseModel, TextGeneration):
         input_emb=None,
         position_ids=None,
     ):
-        output_tensor = self.model(
+        model_forward = self.model if self._compiled_model_forward is None else self._compiled_model_forward
+        output_tensor = model_forward(
             input_ids=input_ids,
             input_attn_mask=input_attn_mask,
             retrieved_ids=retrieved_ids,
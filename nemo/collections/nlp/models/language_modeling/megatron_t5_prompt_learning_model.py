@@ -445,7 +445,7 @@ class MegatronT5PromptLearningModel(MegatronBasePromptLearningModel):
             if num_workers > 0
             else False,  # (@adithyare and @eharper) We need to set this to True to get around issues with spawn=True
         )
-        print('build success', len(dataloader), dataset_paths)
+        logging.debug(f'Built prompt learning dataloader with {len(dataloader)} batches from {dataset_paths}')
         return dataset, dataloader
 
     def predict_step(self, batch: Any, batch_idx: int, dataloader_idx: int = 0) -> Any:
@@ -193,6 +193,7 @@ def get_encoder_model(
             sequence_parallel=sequence_parallel,
             gradient_accumulation_fusion=gradient_accumulation_fusion,
             turn_off_rop=turn_off_rop,
+            use_flash_attention=use_flash_attention,
             version=version,
         )
     elif arch == "perceiver":
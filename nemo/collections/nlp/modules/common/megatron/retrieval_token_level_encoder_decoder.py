@@ -101,6 +101,7 @@ class MegatronRetrievalTokenLevelEncoderDecoderModule(MegatronModule):
         normalize_attention_scores=True,
         activations_checkpoint_granularity=None,
         megatron_lm_compatible=False,
+        use_flash_attention=False,
         version=1,
     ):
         super(MegatronRetrievalTokenLevelEncoderDecoderModule, self).__init__()
@@ -161,6 +162,9 @@ class MegatronRetrievalTokenLevelEncoderDecoderModule(MegatronModule):
                 else:
                     enc_layer_types.append(LayerType.encoder)
 
+            # flash attention is only used by the retrieval encoder, whose attention masks are pure padding masks.
+            # The decoders enforce causality and the EOD attention reset through a custom mask with a padding
+            # mask type, which the flash attention path would reduce to padding only.
             self.encoder = get_encoder_model(
                 arch="retro",
                 hidden_size=hidden_size,
@@ -204,6 +208,7 @@ class MegatronRetrievalTokenLevelEncoderDecoderModule(MegatronModule):
                 layer_number_offset=0,
                 normalize_attention_scores=normalize_attention_scores,
                 turn_off_rop=megatron_lm_compatible,
+                use_flash_attention=use_flash_attention,
                 version=version,
             )
             self._encoder_key = "encoder"
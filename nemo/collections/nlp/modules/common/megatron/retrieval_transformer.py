@@ -81,6 +81,7 @@ class MegatronRetrievalTransformerEncoderModule(MegatronModule):
         normalize_attention_scores=True,
         megatron_legacy=False,
         turn_off_rop=False,
+        use_flash_attention=False,
         version=1,  # model version
     ):
         super(MegatronRetrievalTransformerEncoderModule, self).__init__()
@@ -145,6 +146,7 @@ class MegatronRetrievalTransformerEncoderModule(MegatronModule):
             gradient_accumulation_fusion=gradient_accumulation_fusion,
             normalize_attention_scores=normalize_attention_scores,
             megatron_legacy=megatron_legacy,
+            use_flash_attention=use_flash_attention,
         )
         rot_dim = hidden_size // num_attention_heads if kv_channels is None else kv_channels
         # partial rotary embeddings, which is better than full rotary
@@ -106,8 +106,7 @@ class InferenceTable(NeuralModule, Exportable):
         self.prompt_table[self.taskname] = PromptEmbedding(self.hidden_size, self.total_virtual_tokens)
         self.prompt_table[self.taskname].clear_prompt_embedding_weights()
         self.is_inference_ready = is_inference_ready
-        for p in self.prompt_table.parameters():
-            p.requires_grad = False
+        self.prompt_table.requires_grad_(False)
 
     def set_prompt_table(self, prompt_representation: torch.Tensor):
         """
@@ -128,10 +128,57 @@ class TestMegatronGPTPromptLearningDataset:
 
         assert len(batch) == 6
 
-        _, _, _, _, _, taskname_ids = batch
+        input_ids, _, _, position_ids, attention_mask, taskname_ids = batch
 
         assert list(taskname_ids[0].numpy()) == tokenizer.text_to_ids("task name A")
 
+        batch_size, seq_length = input_ids.shape
+        expected_mask = torch.tril(torch.ones((batch_size, seq_length, seq_length))).view(
+            batch_size, 1, seq_length, seq_length
+        )
+        assert torch.equal(attention_mask, expected_mask < 0.5)
+        assert attention_mask.is_contiguous()
+        assert torch.equal(position_ids, torch.arange(seq_length).expand(batch_size, seq_length))
+        assert position_ids.is_contiguous()
+
+        os.remove(dataset_path)
+
+    @pytest.mark.run_only_on('GPU')
+    @pytest.mark.unit
+    def test_prompt_learning_dataset_loss_mask(self):
+        tokenizer = get_nmt_tokenizer(library='megatron', model_name='GPT2BPETokenizer')
+        task_templates = get_task_templates()
+        dataset_path = create_temp_dataset()
+
+        # Setup virtual token place holders
+        total_virtual_tokens = 10
+        pseudo_tokens = get_pseudo_tokens(total_virtual_tokens)
+        tokenizer.add_special_tokens({'additional_special_tokens': pseudo_tokens})
+
+        dataset = get_prompt_tuning_dataset(
+            dataset_path, tokenizer, VirtualPromptSource.PROMPT_ENCODER, task_templates, pseudo_tokens,
+        )
+
+        # Mix of answer_only_loss (task A) and virtual token masked (task B) examples
+        batch = [dataset[i] for i in range(20, 28)]
+        _, input_ids, answer_starts = zip(*batch)
+        batch_max = max(len(ids) for ids in input_ids) + 3
+        padded_input_ids, loss_mask = dataset.pad_batch_and_build_loss_mask(input_ids, batch_max, answer_starts)
+
+        assert padded_input_ids.shape == (8, batch_max)
+        assert loss_mask.dtype == torch.float
+
+        for i, (ids, answer_start_idx) in enumerate(zip(input_ids, answer_starts)):
+            ids = ids.tolist()
+            if answer_start_idx is not None:
+                expected = [float(idx >= answer_start_idx) for idx in range(len(ids))]
+            else:
+                expected = [float(token_id not in dataset.pseudo_token_ids) for token_id in ids]
+            expected += [0.0] * (batch_max - len(ids))
+
+            assert padded_input_ids[i].tolist() == ids + [tokenizer.unk_id] * (batch_max - len(ids))
+            assert loss_mask[i].tolist() == expected
+
         os.remove(dataset_path)
 
 
@@ -139,4 +186,5 @@ if __name__ == "__main__":
     t = TestMegatronGPTPromptLearningDataset()
     t.test_init_prompt_learning_dataset()
     t.test_prompt_learning_dataset_collate_fn_prompt_encoder()
+    t.test_prompt_learning_dataset_loss_mask()
     print('-' * 50 + '\nALL PROMPT TUNING UNIT TESTS PASS!\n' + '-' * 50)
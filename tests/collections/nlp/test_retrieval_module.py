@@ -13,11 +13,15 @@
 # limitations under the License.
 
 
+from types import SimpleNamespace
+
 import pytest
 import torch
 from einops import rearrange
+from omegaconf import OmegaConf
 from pytorch_lightning.trainer.trainer import Trainer
 
+from nemo.collections.nlp.models.language_modeling.megatron_retrieval_model import MegatronRetrievalModel
 from nemo.collections.nlp.modules.common.megatron.attention import ParallelChunkedCrossAttention
 from nemo.collections.nlp.modules.common.megatron.layer_type import LayerType
 from nemo.collections.nlp.modules.common.megatron.megatron_init import initialize_model_parallel_for_nemo
@@ -43,6 +47,13 @@ try:
 except (ImportError, ModuleNotFoundError):
     HAVE_APEX = False
 
+try:
+    import flash_attn
+
+    HAVE_FA = True
+except (ImportError, ModuleNotFoundError):
+    HAVE_FA = False
+
 try:
     from megatron.core.enums import ModelType
 
@@ -53,6 +64,45 @@ except (ImportError, ModuleNotFoundError):
     HAVE_MEGATRON_CORE = False
 
 
+class RetrievalModuleStub(torch.nn.Module):
+    """ Stand-in for the RETRO module, MegatronRetrievalModel.forward only dispatches to it """
+
+    def forward(self, input_ids, input_attn_mask, retrieved_ids, retrieved_attn_mask, **kwargs):
+        return input_ids * input_attn_mask
+
+
+@pytest.mark.unit
+def test_retrieval_model_compile_forward(monkeypatch):
+    compiled_calls = []
+
+    def spy_compile(fn, **compile_kwargs):
+        def compiled_fn(*args, **kwargs):
+            compiled_calls.append(kwargs)
+            return fn(*args, **kwargs)
+
+        return compiled_fn
+
+    monkeypatch.setattr(torch, 'compile', spy_compile, raising=False)
+
+    input_ids = torch.randint(0, 16, (2, 8))
+    input_attn_mask = input_ids != 0
+    retrieved_ids = torch.randint(0, 16, (2, 2, 2, 8))
+    retrieved_attn_mask = retrieved_ids != 0
+
+    model = SimpleNamespace(cfg=OmegaConf.create({'compile_forward': False}), model=RetrievalModuleStub())
+    MegatronRetrievalModel._setup_compiled_forward(model)
+    assert model._compiled_model_forward is None
+    MegatronRetrievalModel.forward(model, input_ids, input_attn_mask, retrieved_ids, retrieved_attn_mask)
+    assert len(compiled_calls) == 0
+
+    model.cfg.compile_forward = True
+    MegatronRetrievalModel._setup_compiled_forward(model)
+    assert model._compiled_model_forward is not None
+    out = MegatronRetrievalModel.forward(model, input_ids, input_attn_mask, retrieved_ids, retrieved_attn_mask)
+    assert len(compiled_calls) == 1
+    assert torch.equal(out, input_ids * input_attn_mask)
+
+
 @pytest.mark.run_only_on('GPU')
 @pytest.mark.skipif(not HAVE_APEX or not HAVE_MEGATRON_CORE, reason="apex or megatron-core is not installed")
 class TestRetrievalModule:
@@ -371,3 +421,73 @@ class TestRetrievalModule:
             ]
         ).cuda()
         assert (mask3d == expected).all()
+
+    @pytest.mark.skipif(not HAVE_FA, reason="flash-attention is not installed")
+    @pytest.mark.unit
+    def test_encoder_decoder_module_flash_attention(self):
+        batch = 2
+        neighbors = 2
+        dim = 128
+        num_attention_heads = 8
+        chunks = 4
+        text_chunk_size = 64
+        input_length = chunks * text_chunk_size
+        vocab_size = 20000
+        pad_id = vocab_size - 1
+
+        class FakeTokenizer:
+            eos_id = vocab_size - 2
+
+        tokenizer = FakeTokenizer()
+
+        def build(use_flash_attention):
+            return (
+                MegatronRetrievalTokenLevelEncoderDecoderModule(
+                    vocab_size=vocab_size,
+                    hidden_size=dim,
+                    max_position_embeddings=input_length,
+                    num_attention_heads=num_attention_heads,
+                    ffn_hidden_size=dim * 4,
+                    precision=16,
+                    chunk_size=text_chunk_size,
+                    enc_num_layers=4,
+                    dec_num_layers=6,
+                    enc_cross_attention=[3],
+                    dec_cross_attention=[3, 5],
+                    add_position_embedding=False,
+                    tokenizer=tokenizer,
+                    hidden_dropout=0.0,
+                    attention_dropout=0.0,
+                    use_flash_attention=use_flash_attention,
+                )
+                .cuda()
+                .half()
+                .eval()
+            )
+
+        encoder_decoder = build(use_flash_attention=False)
+        encoder_decoder_fa = build(use_flash_attention=True)
+        for param_fa, param in zip(encoder_decoder_fa.parameters(), encoder_decoder.parameters()):
+            param_fa.data.copy_(param.data)
+
+        # EOD tokens in the input exercise the decoder attention reset, which must stay on the non-flash path
+        hidden = torch.randint(0, vocab_size - 2, (batch, input_length)).cuda()
+        hidden[:, text_chunk_size // 2 :: text_chunk_size] = tokenizer.eos_id
+        hidden_mask = hidden != pad_id
+        retrieved = torch.randint(0, vocab_size - 2, (batch, chunks, neighbors, 2 * text_chunk_size)).cuda()
+        padded_retrieved = retrieved.clone()
+        # neighbors padded to the retrieval length with pad_id, as RetroQAFineTuneDataset does
+        padded_retrieved[:, :, 0, 3 * text_chunk_size // 2 :] = pad_id
+        padded_retrieved[:, 1:, 1, text_chunk_size:] = pad_id
+
+        for retrieved_ids in (retrieved, padded_retrieved):
+            context_mask = retrieved_ids != pad_id
+            with torch.no_grad():
+                out = encoder_decoder(
+                    hidden, hidden_mask, retrieved_ids=retrieved_ids, retrieved_attn_mask=context_mask
+                )
+                out_fa = encoder_decoder_fa(
+                    hidden, hidden_mask, retrieved_ids=retrieved_ids, retrieved_attn_mask=context_mask
+                )
+            # padded encoder rows differ between the two paths but only feed masked keys in the decoder
+            torch.testing.assert_close(out, out_fa, atol=1e-2, rtol=1e-2)